@@ -1,29 +1,74 @@
+import re
 import sys
 import requests
 import pandas as pd
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 BASE_URL_TEMPLATE = "https://finance.yahoo.com/markets/crypto/all/?start={start}&count=100"
 
+# Global HTTP session: reuses the Yahoo connection across pages instead of
+# paying a TCP+TLS handshake per request
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": "Mozilla/5.0"})
+_SESSION.mount(
+    "https://",
+    requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16),
+)
 
-def _fetch_page(start: int, headers: dict) -> list[str]:
+# Only the ticker table matters; skip building a tree for nav/footer markup
+STRAINER = SoupStrainer(["table", "tr", "td", "span"])
+
+# Yahoo's markup is templated, so the symbol spans can be pulled straight
+# out of the raw bytes without building a DOM at all
+SYMBOL_RE = re.compile(rb'class="symbol[^"]*"[^>]*>([A-Z0-9]+-USD)<')
+
+# A valid coin is an all-letters base plus the -USD suffix; one match
+# replaces the endswith/split/isalpha checks and captures the base
+VALID_RE = re.compile(r"^([A-Z]+)-USD$")
+
+# selectolax wraps a C HTML5 parser and is ~10-20x faster than BeautifulSoup;
+# fall back to the BS4 path below if it is not installed
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# lxml parses ~5-10x faster than the pure-Python html.parser; fall back if missing
+try:
+    import lxml  # noqa: F401
+    BS_PARSER = "lxml"
+except ImportError:
+    BS_PARSER = "html.parser"
+
+
+def _fetch_page(start: int) -> list[str]:
 
     url = BASE_URL_TEMPLATE.format(start=start)
-    resp = requests.get(url, headers=headers, timeout=5)
+    resp = _SESSION.get(url, timeout=5)
     resp.raise_for_status()
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    rows = soup.select("table tbody tr")
-    page_symbols: list[str] = []
-
-    for row in rows:
-        cell = row.find("td", attrs={"data-testid-cell": "ticker"})
-        if not cell:
-            continue
-        span = cell.find("span", class_="symbol")
-        if not span:
-            continue
+    page_symbols = [m.group(1).decode() for m in SYMBOL_RE.finditer(resp.content)]
+    if page_symbols:
+        return page_symbols
+
+    # Regex found nothing – either an empty page or drifted markup, so
+    # fall through to a real HTML parser before giving up
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(resp.text)
+        page_symbols = []
+        for node in tree.css('td[data-testid-cell="ticker"] span.symbol'):
+            symbol = node.text(strip=True)
+            if symbol:
+                page_symbols.append(symbol)
+        return page_symbols
+
+    soup = BeautifulSoup(resp.text, BS_PARSER, parse_only=STRAINER)
+    page_symbols = []
+
+    # The strainer already limits the tree to the ticker table, so one
+    # find_all replaces the CSS select + per-row td/span lookups
+    for span in soup.find_all("span", class_="symbol"):
         symbol = span.get_text(strip=True)
         if symbol:
             page_symbols.append(symbol)
@@ -31,21 +76,8 @@ def _fetch_page(start: int, headers: dict) -> list[str]:
     return page_symbols
 
 
-def _is_valid_symbol(symbol: str) -> bool:
-    if not symbol.endswith("-USD"):
-        return False
-    base = symbol.split("-")[0].strip()
-    if not base:
-        return False
-    if not base.isalpha():
-        return False
-    return True
-
-
 def get_symbols(limit: int = 1000, batch_pages: int = 8, max_pages: int = 100) -> pd.DataFrame:
 
-    headers = {"User-Agent": "Mozilla/5.0"}
-
     print(
         f"\nFilter 1: Fetching crypto tickers in parallel batches "
         f"until we reach {limit} valid coins...\n"
@@ -75,39 +107,38 @@ def get_symbols(limit: int = 1000, batch_pages: int = 8, max_pages: int = 100) -
         page_results: dict[int, list[str]] = {}
         with ThreadPoolExecutor(max_workers=len(batch_starts)) as executor:
             futures = {
-                executor.submit(_fetch_page, start, headers): start
+                executor.submit(_fetch_page, start): start
                 for start in batch_starts
             }
 
             for future in as_completed(futures):
                 start = futures[future]
                 try:
-                    symbols_page = future.result()
+                    page_results[start] = future.result()
                 except Exception as e:
                     print(f"\nError fetching page start={start}: {e}")
-                    symbols_page = []
-
-                page_results[start] = symbols_page
+                    page_results[start] = []
 
         total_pages_fetched += len(page_results)
 
-        # Process pages in order of 'start' for deterministic behavior
-        for start in sorted(page_results.keys()):
+        # Pages must be consumed in 'start' order: symbols.csv keeps
+        # Yahoo's market-cap order and api_symbols derives id/rank from
+        # row position, so completion order can't decide the output
+        for start in sorted(page_results):
             page_symbols = page_results[start]
             if page_symbols:
                 any_data = True
 
-            added_this_page = 0
             for sym in page_symbols:
-                if not _is_valid_symbol(sym):
+                m = VALID_RE.match(sym)
+                if not m:
                     continue
-                base = sym.split("-")[0].strip()
+                base = m.group(1)
                 if base in seen_bases:
                     continue
 
                 final_symbols.append(sym)
                 seen_bases.add(base)
-                added_this_page += 1
 
                 if len(final_symbols) >= limit:
                     break
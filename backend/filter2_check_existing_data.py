@@ -8,6 +8,10 @@ DB_PATH = "Program\\crypto.db"
 def ensure_db():
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL;")
+    cur.execute("PRAGMA synchronous=NORMAL;")
+    cur.execute("PRAGMA temp_store=MEMORY;")
+    cur.execute("PRAGMA cache_size=-65536;")  # 64MB page cache
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS prices (
@@ -41,15 +45,15 @@ def get_existing_status(
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
 
-    plan_rows = []
-    for sym in symbols:
-        cur.execute(
-            "SELECT MAX(date) FROM prices WHERE symbol = ?;",
-            (sym,),
-        )
-        row = cur.fetchone()
-        last_date = row[0] if row and row[0] is not None else pd.NA
-        plan_rows.append({"symbol": sym, "last_date": last_date})
+    # One grouped scan over the (symbol, date) PK index instead of a
+    # MAX(date) point query per symbol
+    cur.execute("SELECT symbol, MAX(date) FROM prices GROUP BY symbol;")
+    last_by_sym = dict(cur.fetchall())
+
+    plan_rows = [
+        {"symbol": sym, "last_date": last_by_sym.get(sym, pd.NA)}
+        for sym in symbols
+    ]
 
     conn.close()
 
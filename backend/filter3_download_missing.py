@@ -1,9 +1,11 @@
+import asyncio
 import os
 import sqlite3
-import requests
+import aiohttp
+import numpy as np
+import orjson
 import pandas as pd
 from datetime import datetime, date, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from queue import Queue
 from threading import Thread
 
@@ -14,9 +16,14 @@ HEADERS = {
     "Accept": "application/json",
 }
 
-# Global HTTP session
-session = requests.Session()
-session.headers.update(HEADERS)
+INSERT_SQL = """
+    INSERT OR IGNORE INTO prices
+    (symbol, date, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?);
+"""
+
+# Rows accumulated in the writer before each write+commit
+COMMIT_ROWS = 5_000
 
 
 # ---------- DB helpers ----------
@@ -46,14 +53,33 @@ def ensure_db():
 
 def db_writer(queue: Queue):
 
-    conn = sqlite3.connect(DB_PATH, timeout=60)
+    conn = sqlite3.connect(DB_PATH, timeout=60, isolation_level=None)
     cur = conn.cursor()
     cur.execute("PRAGMA journal_mode=WAL;")
     cur.execute("PRAGMA synchronous=NORMAL;")
-    conn.commit()
+    cur.execute("PRAGMA mmap_size=268435456;")  # 256MB memory-mapped reads
 
     total_written = 0
 
+    # Accumulate incoming batches and write+commit once per COMMIT_ROWS,
+    # so a symbol with a handful of new rows no longer costs a full fsync
+    pending_rows: list[tuple] = []
+
+    def flush():
+        nonlocal total_written
+        if not pending_rows:
+            return
+        try:
+            cur.execute("BEGIN;")
+            conn.executemany(INSERT_SQL, pending_rows)
+            conn.commit()
+            total_written += len(pending_rows)
+        except Exception as e:
+            conn.rollback()  # close the open BEGIN so later flushes can commit
+            print(f"[ERROR] DB insert batch failed: {e}")
+        finally:
+            pending_rows.clear()
+
     try:
         while True:
             item = queue.get()
@@ -64,21 +90,12 @@ def db_writer(queue: Queue):
             if not rows:
                 continue
 
-            try:
-                cur.executemany(
-                    """
-                    INSERT OR IGNORE INTO prices
-                    (symbol, date, open, high, low, close, volume)
-                    VALUES (?, ?, ?, ?, ?, ?, ?);
-                    """,
-                    rows,
-                )
-                conn.commit()
-                total_written += len(rows)
-            except Exception as e:
-                print(f"[ERROR] DB insert batch failed: {e}")
+            pending_rows.extend(rows)
+            if len(pending_rows) >= COMMIT_ROWS:
+                flush()
 
     finally:
+        flush()
         conn.close()
         print(f"Total rows written in this run: {total_written}")
 
@@ -116,7 +133,9 @@ def _compute_start_date(last_date: date | None, years_back: int = 10) -> date:
 
 # ---------- Yahoo fetch ----------
 
-def yahoo_fetch_range_rows(symbol: str, start_dt: date, end_dt: date) -> list[tuple]:
+async def yahoo_fetch_range_rows(
+    session: aiohttp.ClientSession, symbol: str, start_dt: date, end_dt: date
+) -> list[tuple]:
 
     if start_dt >= end_dt:
         return []
@@ -132,8 +151,8 @@ def yahoo_fetch_range_rows(symbol: str, start_dt: date, end_dt: date) -> list[tu
     }
 
     try:
-        resp = session.get(url, params=params, timeout=10)
-        data = resp.json()
+        async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            data = orjson.loads(await resp.read())
     except Exception as e:
         print(f"[ERROR] Request failed for {symbol}: {e}")
         return []
@@ -151,11 +170,22 @@ def yahoo_fetch_range_rows(symbol: str, start_dt: date, end_dt: date) -> list[tu
     closes = quote.get("close", []) or []
     volumes = quote.get("volume", []) or []
 
+    if not timestamps:
+        return []
+
+    # One vectorized pass turns every timestamp into 'YYYY-MM-DD' instead
+    # of three datetime allocations per row
+    dates = (
+        np.asarray(timestamps, dtype="int64")
+        .astype("datetime64[s]")
+        .astype("datetime64[D]")
+        .astype(str)
+    )
+
     rows: list[tuple] = []
-    for t, o, h, l, c, v in zip(timestamps, opens, highs, lows, closes, volumes):
+    for dt_str, o, h, l, c, v in zip(dates, opens, highs, lows, closes, volumes):
         if o is None or h is None or l is None or c is None:
             continue
-        dt_str = datetime.utcfromtimestamp(t).date().isoformat()
         rows.append(
             (
                 symbol,
@@ -172,7 +202,7 @@ def yahoo_fetch_range_rows(symbol: str, start_dt: date, end_dt: date) -> list[tu
 
 
 
-def fetch_worker(symbol: str, raw_last_date):
+async def fetch_worker(session: aiohttp.ClientSession, symbol: str, raw_last_date):
 
     last_dt = _normalize_last_date(raw_last_date)
     start_dt = _compute_start_date(last_dt, years_back=10)
@@ -182,10 +212,47 @@ def fetch_worker(symbol: str, raw_last_date):
     if start_dt >= end_dt:
         return symbol, []
 
-    rows = yahoo_fetch_range_rows(symbol, start_dt, end_dt)
+    rows = await yahoo_fetch_range_rows(session, symbol, start_dt, end_dt)
     return symbol, rows
 
 
+async def _fetch_all(symbols: list[str], last_dates: list, q: Queue, concurrency: int) -> int:
+
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency)
+
+    total_rows = 0
+    completed = 0
+
+    async with aiohttp.ClientSession(connector=connector, headers=HEADERS) as session:
+        tasks = [
+            asyncio.ensure_future(fetch_worker(session, sym, last_date))
+            for sym, last_date in zip(symbols, last_dates)
+        ]
+
+        for fut in asyncio.as_completed(tasks):
+            try:
+                sym, rows = await fut
+                n_rows = len(rows)
+                total_rows += n_rows
+                completed += 1
+
+                if n_rows > 0:
+                    # q.put can block when the writer lags; hand it off so
+                    # the event loop keeps draining responses
+                    await asyncio.to_thread(q.put, rows)
+
+                if completed % 200 == 0 or completed == len(symbols):
+                    print(
+                        f"   Progress: {completed}/{len(symbols)} symbols done "
+                        f"(total new rows fetched: {total_rows})"
+                    )
+
+            except Exception as e:
+                print(f"Fetch worker crashed: {e}")
+
+    return total_rows
+
+
 # ---------- Orchestrator ----------
 
 def update_data(download_plan_csv: str = "Program\\download_plan.csv", workers: int | None = None):
@@ -207,14 +274,13 @@ def update_data(download_plan_csv: str = "Program\\download_plan.csv", workers:
         return
 
     if workers is None:
-        cpu = os.cpu_count() or 4
-        workers = cpu * 4
+        workers = 100
 
     workers = min(workers, len(symbols))
 
     print(
         f"\nFilter 3: Starting Yahoo downloads (incremental, up to 10 years) "
-        f"with {workers} fetch threads for {len(symbols)} symbols...\n"
+        f"with up to {workers} concurrent requests for {len(symbols)} symbols...\n"
     )
 
     q: Queue = Queue(maxsize=workers * 4)
@@ -222,34 +288,10 @@ def update_data(download_plan_csv: str = "Program\\download_plan.csv", workers:
     writer_thread = Thread(target=db_writer, args=(q,), daemon=True)
     writer_thread.start()
 
-    total_rows = 0
-    completed = 0
-
-    # Fetch in parallel
-    with ThreadPoolExecutor(max_workers=workers) as pool:
-        futures = [
-            pool.submit(fetch_worker, sym, last_date)
-            for sym, last_date in zip(symbols, last_dates)
-        ]
-
-        for fut in as_completed(futures):
-            try:
-                sym, rows = fut.result()
-                n_rows = len(rows)
-                total_rows += n_rows
-                completed += 1
-
-                if n_rows > 0:
-                    q.put(rows)  # send batch to writer
-
-                if completed % 200 == 0 or completed == len(symbols):
-                    print(
-                        f"   Progress: {completed}/{len(symbols)} symbols done "
-                        f"(total new rows fetched: {total_rows})"
-                    )
-
-            except Exception as e:
-                print(f"Fetch worker crashed: {e}")
+    # One event loop + one TCP pool replaces the old thread pool: the
+    # downloads are network-bound, so coroutines carry the same
+    # concurrency without a thread stack per symbol
+    total_rows = asyncio.run(_fetch_all(symbols, last_dates, q, workers))
 
     q.put(None)
     writer_thread.join()
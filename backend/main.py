@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+import os
 import sqlite3
+import time
 import pandas as pd
 
 from .filter1_scrape_symbols import get_symbols
@@ -10,7 +13,18 @@ from .filter3_download_missing import update_data
 DB_PATH = "Program/crypto.db"
 SYMBOLS_CSV = "Program/symbols.csv"
 
-app = FastAPI()
+# /api/symbols cache: the ETL is the only writer and invalidates
+# explicitly, so a short TTL bounds staleness for everything else
+CACHE_TTL_SECONDS = 30
+_CACHE = {"t": 0.0, "data": None}
+
+PRICE_KEYS = ("date", "open", "high", "low", "close", "volume")
+
+# symbols.csv only changes when the ETL rewrites it, so the parsed
+# id/rank/name frame is cached keyed on the file's mtime
+_SYM_CACHE = {"mtime": 0.0, "df": None}
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +41,10 @@ def get_connection():
     Separate connection per request is fine for SQLite.
     """
     conn = sqlite3.connect(DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-65536;")  # 64MB page cache
     return conn
 
 
@@ -35,6 +53,10 @@ def load_latest_and_change_all():
     Load latest price/volume AND 24h change for ALL symbols
     with ONE scan over the prices table.
 
+    Ordering by (symbol ASC, date ASC) matches the PRIMARY KEY index,
+    so SQLite streams the rows without a sort step; we just remember the
+    last two closes per symbol as they go by.
+
     Returns:
         latest:  { 'BTC-USD': {'price': 12345.0, 'vol': '12.3M'}, ... }
         changes: { 'BTC-USD': 1.23, ... }  # percentage
@@ -45,31 +67,39 @@ def load_latest_and_change_all():
     cur.execute("""
                 SELECT symbol, date, close, volume
                 FROM prices
-                ORDER BY symbol ASC, date DESC
+                ORDER BY symbol ASC, date ASC
                 """)
 
     latest = {}
     changes = {}
 
+    def finalize(symbol, prev_close, last_close, last_volume):
+        latest[symbol] = {
+            "price": last_close,
+            "vol": f"{round(last_volume / 1_000_000, 2)}M"
+        }
+        if prev_close is not None and prev_close != 0:
+            changes[symbol] = round(((last_close - prev_close) / prev_close) * 100, 2)
+
     current_symbol = None
+    prev_close = None
     last_close = None
+    last_volume = None
 
-    for symbol, date, close, volume in cur.fetchall():
+    for symbol, date, close, volume in cur:
         if symbol != current_symbol:
+            if current_symbol is not None:
+                finalize(current_symbol, prev_close, last_close, last_volume)
             current_symbol = symbol
+            prev_close = None
             last_close = None
 
-        if symbol not in latest:
-            latest[symbol] = {
-                "price": float(close),
-                "vol": f"{round(volume / 1_000_000, 2)}M"
-            }
-            last_close = float(close)
+        prev_close = last_close
+        last_close = float(close)
+        last_volume = volume
 
-        elif symbol not in changes and last_close is not None:
-            prev_close = float(close)
-            if prev_close != 0:
-                changes[symbol] = round(((last_close - prev_close) / prev_close) * 100, 2)
+    if current_symbol is not None:
+        finalize(current_symbol, prev_close, last_close, last_volume)
 
     conn.close()
     return latest, changes
@@ -80,32 +110,39 @@ def api_symbols():
     """
     Returns list of symbols with:
         id, rank, symbol, name, price, vol, change
-    All price/volume/change values precomputed in ONE DB scan.
+    All price/volume/change values precomputed in ONE DB scan,
+    and the finished records are cached for CACHE_TTL_SECONDS.
     """
-    df = pd.read_csv(SYMBOLS_CSV)
-
-    df["id"] = range(1, len(df) + 1)
-    df["rank"] = df["id"]
-    df["name"] = df["symbol"].str.split("-").str[0]
+    if _CACHE["data"] is not None and time.time() - _CACHE["t"] < CACHE_TTL_SECONDS:
+        return _CACHE["data"]
 
-    latest, changes = load_latest_and_change_all()
+    mtime = os.path.getmtime(SYMBOLS_CSV)
+    if _SYM_CACHE["df"] is None or mtime != _SYM_CACHE["mtime"]:
+        base_df = pd.read_csv(SYMBOLS_CSV)
+        base_df["id"] = range(1, len(base_df) + 1)
+        base_df["rank"] = base_df["id"]
+        base_df["name"] = base_df["symbol"].str.split("-", n=1).str[0]
+        _SYM_CACHE["df"] = base_df
+        _SYM_CACHE["mtime"] = mtime
 
-    def get_price(sym):
-        info = latest.get(sym)
-        return info["price"] if info else 0.0
+    # Copy so the per-request price/vol/change columns never mutate the cache
+    df = _SYM_CACHE["df"].copy()
 
-    def get_vol(sym):
-        info = latest.get(sym)
-        return info["vol"] if info else "0"
+    latest, changes = load_latest_and_change_all()
 
-    def get_change(sym):
-        return changes.get(sym, 0.0)
+    # Flat dicts + Series.map keep the per-row work inside pandas instead
+    # of calling a Python getter per symbol
+    price_map = {sym: info["price"] for sym, info in latest.items()}
+    vol_map = {sym: info["vol"] for sym, info in latest.items()}
 
-    df["price"] = df["symbol"].apply(get_price)
-    df["vol"] = df["symbol"].apply(get_vol)
-    df["change"] = df["symbol"].apply(get_change)
+    df["price"] = df["symbol"].map(price_map).fillna(0.0)
+    df["vol"] = df["symbol"].map(vol_map).fillna("0")
+    df["change"] = df["symbol"].map(changes).fillna(0.0)
 
-    return df.to_dict(orient="records")
+    records = df.to_dict(orient="records")
+    _CACHE["data"] = records
+    _CACHE["t"] = time.time()
+    return records
 
 
 @app.get("/api/prices/{symbol}")
@@ -126,17 +163,9 @@ def api_prices(symbol: str):
     rows = cur.fetchall()
     conn.close()
 
-    return [
-        {
-            "date": r[0],
-            "open": r[1],
-            "high": r[2],
-            "low": r[3],
-            "close": r[4],
-            "volume": r[5],
-        }
-        for r in rows
-    ]
+    # dict(zip(...)) with a shared key tuple is cheaper than a dict
+    # literal per row, and the frontend keeps the records shape it expects
+    return [dict(zip(PRICE_KEYS, r)) for r in rows]
 
 
 @app.post("/api/etl/run")
@@ -150,5 +179,6 @@ def api_run_etl():
     get_symbols(limit=1000)
     get_existing_status()
     update_data()
+    _CACHE["t"] = 0.0  # force /api/symbols to recompute on next request
     return {"status": "completed"}
 